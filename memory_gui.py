@@ -23,7 +23,7 @@ Usage:
 
 import tkinter as tk
 from tkinter import ttk, scrolledtext, filedialog, messagebox
-from typing import List, Optional, Tuple, Dict, Any
+from typing import Callable, List, Optional, Sequence, Tuple, Dict, Any
 import math
 
 from memory_model import (
@@ -73,6 +73,9 @@ class ColorScheme:
 class MemoryRenderer:
     """Renders memory snapshots onto a tkinter canvas."""
 
+    # Canvas tag carried by every pointer arrow
+    ARROW_TAG = "pointer_arrow"
+
     def __init__(self, canvas: tk.Canvas, colors: ColorScheme):
         """Initialize renderer.
 
@@ -99,11 +102,26 @@ class MemoryRenderer:
         # address -> (x, y, width, height) bounding box
         self.item_positions: Dict[int, Tuple[int, int, int, int]] = {}
 
+        # Number of pointer arrows drawn since the last clear
+        self.arrow_count = 0
+
+        # Observers called with the snapshot once its arrows are drawn
+        self._render_callbacks: List[Callable[[MemorySnapshot], None]] = []
+
     def clear(self) -> None:
         """Clear the canvas."""
         self.canvas.delete("all")
         self.item_map.clear()
         self.item_positions.clear()
+        self.arrow_count = 0
+
+    def add_render_callback(self, callback: Callable[[MemorySnapshot], None]) -> None:
+        """Register a function to call after each snapshot's pointers are drawn.
+
+        Args:
+            callback: Called with the rendered snapshot
+        """
+        self._render_callbacks.append(callback)
 
     def render_snapshot(self, snapshot: MemorySnapshot) -> None:
         """Render a complete memory snapshot.
@@ -152,7 +170,8 @@ class MemoryRenderer:
         heap_height = self._render_heap(
             snapshot.heap.blocks,
             col3_x,
-            y_offset
+            y_offset,
+            order=snapshot.heap_addresses(),
         )
 
         # Render CPU state below globals if present
@@ -344,9 +363,18 @@ class MemoryRenderer:
 
         return y - start_y
 
-    def _render_heap(self, blocks: Dict[int, HeapBlock], x: int, y: int) -> int:
+    def _render_heap(
+        self,
+        blocks: Dict[int, HeapBlock],
+        x: int,
+        y: int,
+        order: Optional[Sequence[int]] = None,
+    ) -> int:
         """Render heap blocks.
 
+        Args:
+            order: Block addresses in ascending order (sorted here if None)
+
         Returns:
             Height of the rendered section
         """
@@ -382,8 +410,10 @@ class MemoryRenderer:
             y += 30
         else:
             # Sort by address
-            sorted_blocks = sorted(blocks.values(), key=lambda b: b.address)
-            for block in sorted_blocks:
+            if order is None:
+                order = sorted(blocks)
+            for addr in order:
+                block = blocks[addr]
                 block_height = self._render_heap_block(x, y, block)
                 y += block_height + self.item_spacing
 
@@ -567,18 +597,18 @@ class MemoryRenderer:
 
         # Check globals
         for var in snapshot.globals_statics.variables.values():
-            if isinstance(var.value, PointerValue) and not var.value.is_null:
+            if type(var.value) is PointerValue and not var.value.is_null:
                 pointers.append((var.address, var.value.address, var.value))
 
         # Check stack
         for frame in snapshot.stack.frames:
-            for var in frame.all_variables().values():
-                if isinstance(var.value, PointerValue) and not var.value.is_null:
+            for _, var in frame.iter_variables():
+                if type(var.value) is PointerValue and not var.value.is_null:
                     pointers.append((var.address, var.value.address, var.value))
 
         # Check heap
         for block in snapshot.heap.blocks.values():
-            if not block.is_freed and isinstance(block.value, PointerValue) and not block.value.is_null:
+            if not block.is_freed and type(block.value) is PointerValue and not block.value.is_null:
                 pointers.append((block.address, block.value.address, block.value))
 
         # Draw arrows for pointers that have both source and target positions
@@ -586,6 +616,9 @@ class MemoryRenderer:
             if src_addr in self.item_positions and tgt_addr in self.item_positions:
                 self._draw_arrow(src_addr, tgt_addr)
 
+        for callback in self._render_callbacks:
+            callback(snapshot)
+
     def _draw_arrow(self, from_addr: int, to_addr: int) -> None:
         """Draw an arrow from one address to another.
 
@@ -618,11 +651,13 @@ class MemoryRenderer:
             fill=self.colors.POINTER_ARROW,
             width=2,
             smooth=True,
-            arrowshape=(10, 12, 5)
+            arrowshape=(10, 12, 5),
+            tags=(self.ARROW_TAG,),
         )
 
         # Lower the arrow so it's behind other items
         self.canvas.tag_lower(arrow_id)
+        self.arrow_count += 1
 
     def _format_value(self, value: Any) -> str:
         """Format a value for display."""
@@ -652,11 +687,12 @@ class MemoryRenderer:
 class MemoryVisualizer:
     """Main GUI window for memory visualization."""
 
-    def __init__(self, snapshots: List[MemorySnapshot]):
+    def __init__(self, snapshots: Sequence[MemorySnapshot]):
         """Initialize the visualizer.
 
         Args:
-            snapshots: List of memory snapshots to visualize
+            snapshots: Memory snapshots to visualize (a list or any
+                indexable sequence, such as a SnapshotSequence)
         """
         self.snapshots = snapshots
         self.current_index = 0
@@ -1013,11 +1049,11 @@ class MemoryVisualizer:
 # Convenience function
 # ============================================================
 
-def visualize_snapshots(snapshots: List[MemorySnapshot]) -> None:
+def visualize_snapshots(snapshots: Sequence[MemorySnapshot]) -> None:
     """Convenience function to visualize snapshots.
 
     Args:
-        snapshots: List of snapshots to visualize
+        snapshots: Snapshots to visualize (list or SnapshotSequence)
     """
     visualizer = MemoryVisualizer(snapshots)
     visualizer.run()
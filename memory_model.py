@@ -10,6 +10,21 @@ This library provides:
 - Console rendering with configurable output
 - Helper utilities for memory inspection and analysis
 
+Performance note:
+    Builder and diff hot paths are allocator/dict-bound, not compute-bound:
+    their cost is copying segments, dict inserts/lookups and string
+    formatting. Optimizations therefore target copy-on-write in the builder
+    and apply_delta (only touched segments and frames are copied), shared
+    immutable leaves (variables, blocks, pointers) and identity
+    short-circuits in diff_snapshots, which skips anything both snapshots
+    share, rather than SIMD/GPU techniques, which have nothing to
+    vectorize here.
+    Long traces are not packed into binary blobs either: values are
+    arbitrary Python objects (structs as dicts, strings, pointers) with no
+    fixed-width encoding, and consecutive snapshots already share every
+    unchanged segment, frame, variable and block, so each extra step only
+    costs memory proportional to what it changed.
+
 Example:
     >>> from memory_model import *
     >>>
@@ -40,10 +55,14 @@ Example:
 
 from __future__ import annotations
 
-import copy
-from dataclasses import dataclass, field
+import functools
+import operator
+import sys
+from collections.abc import Sequence
+from copy import deepcopy as _deepcopy
+from dataclasses import dataclass, field, replace
 from enum import Enum
-from typing import Any, Dict, List, Optional, Set, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple, Union
 
 
 # ============================================================
@@ -74,14 +93,44 @@ class ConsoleRenderConfig:
 render_config = ConsoleRenderConfig()
 
 
+def _render_key() -> Tuple[Any, ...]:
+    """Return a hashable key describing the current render configuration."""
+    c = render_config
+    return (
+        c.pointer_arrow,
+        c.show_addresses_hex,
+        c.max_struct_depth,
+        c.indent_size,
+        c.show_frame_pointers,
+        c.compact_mode,
+    )
+
+
+@functools.lru_cache(maxsize=4096)
+def _hex(addr: int) -> str:
+    """Return the hexadecimal rendering of an address.
+
+    Addresses recur constantly across the snapshots of a trace, so the
+    rendered strings are memoized instead of being rebuilt on every call.
+    """
+    return hex(addr)
+
+
 # ============================================================
 #  Types de base : pointeurs, description de champs, struct, union
 # ============================================================
 
-@dataclass
+# Pointeurs NULL partagés, indexés par type pointé
+_NULL_POINTERS: Dict[str, PointerValue] = {}
+
+
+@dataclass(frozen=True, slots=True)
 class PointerValue:
     """Represents a pointer value with target address and type.
 
+    Pointer values are immutable. NULL pointers are flyweights: every
+    PointerValue(0, t, is_null=True) for a given type t is the same object.
+
     Attributes:
         address: Memory address the pointer points to
         target_type: Type of the pointed-to value
@@ -91,12 +140,42 @@ class PointerValue:
     target_type: str
     is_null: bool = False
 
+    def __new__(
+        cls,
+        address: int = 0,
+        target_type: str = "",
+        is_null: bool = False,
+    ) -> PointerValue:
+        """Return the shared instance for NULL pointers, a new one otherwise."""
+        if is_null and address == 0 and cls is PointerValue:
+            ptr = _NULL_POINTERS.get(target_type)
+            if ptr is None:
+                ptr = _NULL_POINTERS[target_type] = object.__new__(cls)
+            return ptr
+        return object.__new__(cls)
+
+    def __post_init__(self) -> None:
+        """Intern the target type name."""
+        object.__setattr__(self, "target_type", sys.intern(self.target_type))
+
+    def __copy__(self) -> PointerValue:
+        """Return self: pointer values are immutable."""
+        return self
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> PointerValue:
+        """Return self: pointer values are immutable."""
+        return self
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        """Unpickle through the constructor so NULL pointers stay shared."""
+        return (type(self), (self.address, self.target_type, self.is_null))
+
     def __str__(self) -> str:
         """Return string representation of the pointer."""
         if self.is_null:
             return "NULL"
         if render_config.show_addresses_hex:
-            addr = hex(self.address)
+            addr = _hex(self.address)
         else:
             addr = str(self.address)
         return f"{render_config.pointer_arrow} {addr}"
@@ -219,7 +298,7 @@ class VariableStorageClass(Enum):
     STATIC = "static"
 
 
-@dataclass
+@dataclass(slots=True)
 class GlobalStaticVariable:
     """Represents a global or static variable.
 
@@ -238,12 +317,17 @@ class GlobalStaticVariable:
     storage_class: VariableStorageClass
     section: str
 
+    def __post_init__(self) -> None:
+        """Intern the type and section names."""
+        self.type_name = sys.intern(self.type_name)
+        self.section = sys.intern(self.section)
+
     def __deepcopy__(self, memo: Dict[int, Any]) -> GlobalStaticVariable:
         """Create a deep copy of the variable."""
         return GlobalStaticVariable(
             name=self.name,
             address=self.address,
-            value=copy.deepcopy(self.value, memo),
+            value=_deepcopy(self.value, memo),
             type_name=self.type_name,
             storage_class=self.storage_class,
             section=self.section,
@@ -283,7 +367,7 @@ class GlobalStaticSegment:
         lines.append("-" * len(header))
 
         for var in self.variables.values():
-            addr = hex(var.address) if render_config.show_addresses_hex else str(var.address)
+            addr = _hex(var.address) if render_config.show_addresses_hex else str(var.address)
             val_str = self._format_value(var.value)
             line = f"{var.name:20} {addr:12} {var.type_name:18} {val_str:15} {var.section:10}"
             lines.append(line)
@@ -307,7 +391,7 @@ class GlobalStaticSegment:
     def __deepcopy__(self, memo: Dict[int, Any]) -> GlobalStaticSegment:
         """Create a deep copy of the segment."""
         return GlobalStaticSegment(
-            variables={k: copy.deepcopy(v, memo) for k, v in self.variables.items()}
+            variables={k: _deepcopy(v, memo) for k, v in self.variables.items()}
         )
 
 
@@ -315,7 +399,7 @@ class GlobalStaticSegment:
 #  Heap
 # ============================================================
 
-@dataclass
+@dataclass(slots=True)
 class HeapBlock:
     """Represents an allocated block on the heap.
 
@@ -334,18 +418,38 @@ class HeapBlock:
     is_freed: bool = False
     allocation_site: Optional[str] = None
 
+    def __post_init__(self) -> None:
+        """Intern the type name and allocation site."""
+        self.type_name = sys.intern(self.type_name)
+        if self.allocation_site is not None:
+            self.allocation_site = sys.intern(self.allocation_site)
+
     def __deepcopy__(self, memo: Dict[int, Any]) -> HeapBlock:
         """Create a deep copy of the heap block."""
         return HeapBlock(
             address=self.address,
             size=self.size,
-            value=copy.deepcopy(self.value, memo),
+            value=_deepcopy(self.value, memo),
             type_name=self.type_name,
             is_freed=self.is_freed,
             allocation_site=self.allocation_site,
         )
 
 
+def _collect_pointer_targets(value: Any, out: List[int]) -> None:
+    """Append the addresses of all non-NULL pointers held by a value."""
+    # Exact type check first: this runs on every value reachable from roots
+    if type(value) is PointerValue:
+        if not value.is_null:
+            out.append(value.address)
+    elif isinstance(value, dict):
+        for v in value.values():
+            _collect_pointer_targets(v, out)
+    elif isinstance(value, (list, tuple)):
+        for v in value:
+            _collect_pointer_targets(v, out)
+
+
 @dataclass
 class HeapSegment:
     """Represents the heap segment.
@@ -372,10 +476,32 @@ class HeapSegment:
         return sum(b.size for b in self.blocks.values() if not b.is_freed)
 
     def find_leaks(self, reachable_addresses: Set[int]) -> List[HeapBlock]:
-        """Find potentially leaked blocks (allocated but not reachable)."""
+        """Find potentially leaked blocks (allocated but not reachable).
+
+        Blocks pointed to by a reachable block (directly or through a
+        struct/array value) are reachable as well, so only the roots held
+        by the stack and globals need to be given.
+
+        Args:
+            reachable_addresses: Root addresses known to be reachable
+
+        Returns:
+            Allocated blocks not reachable from any root
+        """
+        blocks = self.blocks
+        marked: Set[int] = set()
+        pending = list(reachable_addresses)
+        while pending:
+            addr = pending.pop()
+            if addr in marked:
+                continue
+            marked.add(addr)
+            block = blocks.get(addr)
+            if block is not None and not block.is_freed:
+                _collect_pointer_targets(block.value, pending)
         return [
-            b for b in self.blocks.values()
-            if not b.is_freed and b.address not in reachable_addresses
+            b for b in blocks.values()
+            if not b.is_freed and b.address not in marked
         ]
 
     def to_console(self) -> str:
@@ -400,7 +526,7 @@ class HeapSegment:
         # Sort by address
         for addr in sorted(self.blocks.keys()):
             block = self.blocks[addr]
-            a = hex(addr) if render_config.show_addresses_hex else str(addr)
+            a = _hex(addr) if render_config.show_addresses_hex else str(addr)
             status = "freed" if block.is_freed else "active"
             val = "<freed>" if block.is_freed else self._format_value(block.value)
             line = f"{a:12} {block.size:<8} {block.type_name:18} {status:8} {val}"
@@ -427,7 +553,7 @@ class HeapSegment:
     def __deepcopy__(self, memo: Dict[int, Any]) -> HeapSegment:
         """Create a deep copy of the segment."""
         return HeapSegment(
-            blocks={k: copy.deepcopy(v, memo) for k, v in self.blocks.items()}
+            blocks={k: _deepcopy(v, memo) for k, v in self.blocks.items()}
         )
 
 
@@ -435,7 +561,7 @@ class HeapSegment:
 #  Stack
 # ============================================================
 
-@dataclass
+@dataclass(slots=True)
 class StackVariable:
     """Represents a variable on the stack.
 
@@ -450,17 +576,21 @@ class StackVariable:
     value: Any
     type_name: str
 
+    def __post_init__(self) -> None:
+        """Intern the type name."""
+        self.type_name = sys.intern(self.type_name)
+
     def __deepcopy__(self, memo: Dict[int, Any]) -> StackVariable:
         """Create a deep copy of the variable."""
         return StackVariable(
             name=self.name,
             address=self.address,
-            value=copy.deepcopy(self.value, memo),
+            value=_deepcopy(self.value, memo),
             type_name=self.type_name,
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class StackFrame:
     """Represents a stack frame for a function call.
 
@@ -477,17 +607,34 @@ class StackFrame:
     return_address: Optional[int] = None
     frame_pointer: Optional[int] = None
 
+    def __post_init__(self) -> None:
+        """Intern the function name."""
+        self.function_name = sys.intern(self.function_name)
+
     def get_variable(self, name: str) -> Optional[StackVariable]:
         """Get a variable (parameter or local) by name."""
-        if name in self.parameters:
-            return self.parameters[name]
+        # Frames are small: a single probe per dict beats `in` + indexing
+        var = self.parameters.get(name)
+        if var is not None:
+            return var
         return self.locals.get(name)
 
+    def iter_variables(self) -> Iterator[Tuple[str, StackVariable]]:
+        """Iterate over all variables in this frame (parameters + locals).
+
+        As in get_variable(), a parameter hides a local of the same name.
+        """
+        params = self.parameters
+        yield from params.items()
+        for name, var in self.locals.items():
+            if name not in params:
+                yield name, var
+
     def all_variables(self) -> Dict[str, StackVariable]:
         """Get all variables in this frame (parameters + locals)."""
-        result = dict(self.parameters)
-        result.update(self.locals)
-        return result
+        if not self.parameters:
+            return dict(self.locals)
+        return dict(self.iter_variables())
 
     def to_console(self) -> str:
         """Render stack frame to console format."""
@@ -495,20 +642,20 @@ class StackFrame:
         lines.append(f"┌─ Frame: {self.function_name} ─┐")
 
         if render_config.show_frame_pointers and self.frame_pointer is not None:
-            fp = hex(self.frame_pointer) if render_config.show_addresses_hex else str(self.frame_pointer)
+            fp = _hex(self.frame_pointer) if render_config.show_addresses_hex else str(self.frame_pointer)
             lines.append(f"│ Frame Pointer: {fp}")
 
         if self.parameters:
             lines.append("│ Parameters:")
             for var in self.parameters.values():
-                addr = hex(var.address) if render_config.show_addresses_hex else str(var.address)
+                addr = _hex(var.address) if render_config.show_addresses_hex else str(var.address)
                 val = self._format_value(var.value)
                 lines.append(f"│   {var.name:15} @{addr:<12} {var.type_name:12} = {val}")
 
         if self.locals:
             lines.append("│ Locals:")
             for var in self.locals.values():
-                addr = hex(var.address) if render_config.show_addresses_hex else str(var.address)
+                addr = _hex(var.address) if render_config.show_addresses_hex else str(var.address)
                 val = self._format_value(var.value)
                 lines.append(f"│   {var.name:15} @{addr:<12} {var.type_name:12} = {val}")
 
@@ -532,8 +679,8 @@ class StackFrame:
         """Create a deep copy of the frame."""
         return StackFrame(
             function_name=self.function_name,
-            locals={k: copy.deepcopy(v, memo) for k, v in self.locals.items()},
-            parameters={k: copy.deepcopy(v, memo) for k, v in self.parameters.items()},
+            locals={k: _deepcopy(v, memo) for k, v in self.locals.items()},
+            parameters={k: _deepcopy(v, memo) for k, v in self.parameters.items()},
             return_address=self.return_address,
             frame_pointer=self.frame_pointer,
         )
@@ -594,7 +741,7 @@ class StackSegment:
     def __deepcopy__(self, memo: Dict[int, Any]) -> StackSegment:
         """Create a deep copy of the segment."""
         return StackSegment(
-            frames=[copy.deepcopy(f, memo) for f in self.frames]
+            frames=[_deepcopy(f, memo) for f in self.frames]
         )
 
 
@@ -602,7 +749,7 @@ class StackSegment:
 #  CPU
 # ============================================================
 
-@dataclass
+@dataclass(slots=True)
 class CpuState:
     """Represents CPU register state.
 
@@ -625,7 +772,7 @@ class CpuState:
         def fmt_addr(addr: Optional[int]) -> str:
             if addr is None:
                 return "(not set)"
-            return hex(addr) if render_config.show_addresses_hex else str(addr)
+            return _hex(addr) if render_config.show_addresses_hex else str(addr)
 
         lines.append(f"PC (Program Counter): {fmt_addr(self.pc)}")
         lines.append(f"SP (Stack Pointer):   {fmt_addr(self.sp)}")
@@ -648,18 +795,45 @@ class CpuState:
             pc=self.pc,
             sp=self.sp,
             bp=self.bp,
-            extra=copy.deepcopy(self.extra, memo),
+            extra=_deepcopy(self.extra, memo),
         )
 
 
+# ============================================================
+#  Messages d'erreur (partagés par SnapshotBuilder et apply_delta)
+# ============================================================
+# Templates are only formatted on the raise path.
+
+_MSG_POP_EMPTY = "Cannot pop frame: stack is empty"
+_MSG_NO_LOCAL = "Local variable '{}' not found in current frame"
+_MSG_ALREADY_ALLOCATED = "Address {} already allocated"
+_MSG_NO_BLOCK = "No heap block at address {}"
+_MSG_DOUBLE_FREE = "Double free detected at address {}"
+_MSG_WRITE_FREED = "Cannot write to freed memory at {}"
+_MSG_READ_FREED = "Cannot read freed memory at {}"
+_MSG_NO_GLOBAL = "No global/static variable named '{}'"
+_MSG_NO_FRAME_INDEX = "No stack frame at index {}"
+
+
 # ============================================================
 #  MemorySnapshot
 # ============================================================
 
-@dataclass
+# A single memory operation for MemorySnapshot.apply_delta(), encoded as a
+# tuple whose first element is the operation name, e.g. ("free", 0x1000).
+Op = Tuple[Any, ...]
+
+
+@dataclass(frozen=True, slots=True)
 class MemorySnapshot:
     """Represents a complete snapshot of program memory at a point in time.
 
+    Snapshots are frozen: new states are derived with SnapshotBuilder or
+    apply_delta(), and successive snapshots may share segment objects.
+    Segments reached through a snapshot must therefore be treated as
+    read-only. Snapshots can be shared freely between threads; their lazy
+    lookup caches may at worst be computed twice.
+
     Attributes:
         step_id: Unique identifier for this snapshot
         description: Human-readable description of this state
@@ -676,57 +850,259 @@ class MemorySnapshot:
     stack: StackSegment
     types: TypeRegistry
     cpu: Optional[CpuState] = None
+    # Next auto-assigned heap address, carried from builder to builder
+    _next_heap_addr: int = field(default=0x1000, repr=False, compare=False)
+    _value_index: Optional[Dict[int, Any]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _pointer_index: Optional[Dict[int, List[Tuple[str, int]]]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _console_cache: Optional[Dict[Tuple[Any, ...], str]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _heap_order: Optional[Tuple[int, ...]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _stack_name_index: Optional[Dict[str, Tuple[int, StackVariable]]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
 
-    def get_value_at_address(self, address: int) -> Optional[Any]:
-        """Look up a value by memory address across all segments."""
-        # Check globals
-        var = self.globals_statics.get_by_address(address)
-        if var:
-            return var.value
-
-        # Check heap
-        block = self.heap.get_block(address)
-        if block and not block.is_freed:
-            return block.value
-
-        # Check stack (all frames)
+    def _build_value_index(self) -> Dict[int, Any]:
+        """Map every live address to its value, honouring lookup priority.
+
+        Globals win over heap blocks, which win over stack variables; within
+        the stack, outer frames and parameters come first.
+        """
+        index: Dict[int, Any] = {}
+        for var in self.globals_statics.variables.values():
+            index.setdefault(var.address, var.value)
+        for block in self.heap.blocks.values():
+            if not block.is_freed:
+                index.setdefault(block.address, block.value)
         for frame in self.stack.frames:
-            for var in frame.all_variables().values():
-                if var.address == address:
-                    return var.value
+            for _, var in frame.iter_variables():
+                index.setdefault(var.address, var.value)
+        object.__setattr__(self, "_value_index", index)
+        return index
+
+    def _build_pointer_index(self) -> Dict[int, List[Tuple[str, int]]]:
+        """Group every pointer in the snapshot by the address it targets."""
+        index: Dict[int, List[Tuple[str, int]]] = {}
+        for var in self.globals_statics.variables.values():
+            if type(var.value) is PointerValue:
+                index.setdefault(var.value.address, []).append(
+                    (f"global {var.name}", var.address)
+                )
+        for block in self.heap.blocks.values():
+            if not block.is_freed and type(block.value) is PointerValue:
+                index.setdefault(block.value.address, []).append(
+                    (f"heap block @ {_hex(block.address)}", block.address)
+                )
+        for frame in self.stack.frames:
+            for _, var in frame.iter_variables():
+                if type(var.value) is PointerValue:
+                    index.setdefault(var.value.address, []).append(
+                        (f"stack {frame.function_name}::{var.name}", var.address)
+                    )
+        object.__setattr__(self, "_pointer_index", index)
+        return index
 
-        return None
+    def heap_addresses(self) -> Tuple[int, ...]:
+        """Return the addresses of all heap blocks in ascending order.
+
+        The addresses are sorted once per snapshot and shared by every
+        caller.
+
+        Returns:
+            Tuple of block addresses
+        """
+        order = self._heap_order
+        if order is None:
+            order = tuple(sorted(self.heap.blocks))
+            object.__setattr__(self, "_heap_order", order)
+        return order
+
+    def get_value_at_address(self, address: int) -> Optional[Any]:
+        """Look up a value by memory address across all segments.
+
+        The address index is built on the first lookup and reused for the
+        lifetime of the snapshot.
+        """
+        index = self._value_index
+        if index is None:
+            index = self._build_value_index()
+        return index.get(address)
+
+    def find_stack_variable(self, name: str) -> Optional[Tuple[int, StackVariable]]:
+        """Find a variable by name in the stack (top to bottom search).
+
+        Same result as stack.find_variable(), but the name index is built on
+        the first lookup and reused for the lifetime of the snapshot.
+
+        Returns:
+            Tuple of (frame_index, variable) or None if not found
+        """
+        index = self._stack_name_index
+        if index is None:
+            # Later (higher) frames overwrite earlier ones: topmost wins
+            index = {}
+            for i, frame in enumerate(self.stack.frames):
+                for var_name, var in frame.iter_variables():
+                    index[var_name] = (i, var)
+            object.__setattr__(self, "_stack_name_index", index)
+        return index.get(name)
 
     def find_all_pointers_to(self, target_address: int) -> List[Tuple[str, int]]:
         """Find all pointers pointing to a given address.
 
+        The reverse pointer index is built on the first query and reused for
+        the lifetime of the snapshot.
+
         Returns:
             List of (location_description, pointer_address) tuples
         """
-        pointers: List[Tuple[str, int]] = []
+        index = self._pointer_index
+        if index is None:
+            index = self._build_pointer_index()
+        return list(index.get(target_address, ()))
 
-        # Check globals
-        for var in self.globals_statics.variables.values():
-            if isinstance(var.value, PointerValue) and var.value.address == target_address:
-                pointers.append((f"global {var.name}", var.address))
+    def apply_delta(
+        self,
+        delta: List[Op],
+        step_id: Optional[int] = None,
+        description: Optional[str] = None,
+    ) -> MemorySnapshot:
+        """Create the next snapshot by applying a list of operations.
+
+        Unlike SnapshotBuilder, only the segments and stack frames touched
+        by the delta are copied; everything else is shared with this
+        snapshot, which is left unchanged.
+
+        Supported operations:
+            ("push_frame", function_name)
+            ("pop_frame",)
+            ("set_local", frame_index, name, value, type_name, address)
+            ("set_parameter", frame_index, name, value, type_name, address)
+            ("update_local", frame_index, name, new_value)
+            ("malloc", address, size, type_name, value[, allocation_site])
+            ("free", address)
+            ("write_heap", address, new_value)
+            ("set_global", name, new_value)
 
-        # Check heap
-        for block in self.heap.blocks.values():
-            if not block.is_freed and isinstance(block.value, PointerValue):
-                if block.value.address == target_address:
-                    pointers.append((f"heap block @ {hex(block.address)}", block.address))
+        Args:
+            delta: Operations to apply, in order
+            step_id: Step ID of the new snapshot (defaults to step_id + 1)
+            description: Description of the new snapshot
 
-        # Check stack
-        for i, frame in enumerate(self.stack.frames):
-            for var in frame.all_variables().values():
-                if isinstance(var.value, PointerValue) and var.value.address == target_address:
-                    pointers.append((f"stack {frame.function_name}::{var.name}", var.address))
+        Returns:
+            A new MemorySnapshot instance
 
-        return pointers
+        Raises:
+            ValueError: On an unknown operation, or the same heap errors
+                as the corresponding SnapshotBuilder methods
+            RuntimeError: On stack errors (see SnapshotBuilder) or an
+                out-of-range frame index
+            KeyError: On unknown heap addresses or global names
+        """
+        variables: Optional[Dict[str, GlobalStaticVariable]] = None
+        blocks: Optional[Dict[int, HeapBlock]] = None
+        frames: Optional[List[StackFrame]] = None
+        owned_frames: Set[int] = set()
+
+        def frame_at(index: int, empty_message: str) -> StackFrame:
+            nonlocal frames
+            if frames is None:
+                frames = list(self.stack.frames)
+            if not frames:
+                raise RuntimeError(empty_message)
+            try:
+                index = range(len(frames))[index]
+            except IndexError:
+                raise RuntimeError(_MSG_NO_FRAME_INDEX.format(index)) from None
+            if index not in owned_frames:
+                frames[index] = _clone_frame(frames[index])
+                owned_frames.add(index)
+            return frames[index]
+
+        for op in delta:
+            kind = op[0]
+            if kind == "push_frame":
+                if frames is None:
+                    frames = list(self.stack.frames)
+                frames.append(StackFrame(function_name=op[1]))
+                owned_frames.add(len(frames) - 1)
+            elif kind == "pop_frame":
+                if frames is None:
+                    frames = list(self.stack.frames)
+                if not frames:
+                    raise RuntimeError(_MSG_POP_EMPTY)
+                frames.pop()
+                owned_frames.discard(len(frames))
+            elif kind in ("set_local", "set_parameter"):
+                _, index, name, value, type_name, address = op
+                frame = frame_at(index, f"No frame on stack for {kind}()")
+                target = frame.locals if kind == "set_local" else frame.parameters
+                target[name] = StackVariable(name, address, value, type_name)
+            elif kind == "update_local":
+                _, index, name, new_value = op
+                frame = frame_at(index, "No frame on stack")
+                var = frame.locals.get(name)
+                if var is None:
+                    raise RuntimeError(_MSG_NO_LOCAL.format(name))
+                frame.locals[name] = StackVariable(name, var.address, new_value, var.type_name)
+            elif kind in ("malloc", "free", "write_heap"):
+                if blocks is None:
+                    blocks = dict(self.heap.blocks)
+                address = op[1]
+                block = blocks.get(address)
+                if kind == "malloc":
+                    size, type_name, value = op[2:5]
+                    if block is not None and not block.is_freed:
+                        raise ValueError(_MSG_ALREADY_ALLOCATED.format(_hex(address)))
+                    blocks[address] = HeapBlock(
+                        address, size, value if value is not None else 0, type_name,
+                        allocation_site=op[5] if len(op) > 5 else None,
+                    )
+                elif block is None:
+                    raise KeyError(_MSG_NO_BLOCK.format(_hex(address)))
+                elif kind == "free":
+                    if block.is_freed:
+                        raise ValueError(_MSG_DOUBLE_FREE.format(_hex(address)))
+                    blocks[address] = _freed_block(block)
+                else:
+                    if block.is_freed:
+                        raise ValueError(_MSG_WRITE_FREED.format(_hex(address)))
+                    blocks[address] = _block_with_value(block, op[2])
+            elif kind == "set_global":
+                if variables is None:
+                    variables = dict(self.globals_statics.variables)
+                _, name, new_value = op
+                var = variables.get(name)
+                if var is None:
+                    raise KeyError(_MSG_NO_GLOBAL.format(name))
+                variables[name] = _global_with_value(var, new_value)
+            else:
+                raise ValueError(f"Unknown delta operation: {kind!r}")
+
+        return replace(
+            self,
+            step_id=step_id if step_id is not None else self.step_id + 1,
+            description=description,
+            globals_statics=(
+                GlobalStaticSegment(variables=variables)
+                if variables is not None else self.globals_statics
+            ),
+            heap=HeapSegment(blocks=blocks) if blocks is not None else self.heap,
+            stack=StackSegment(frames=frames) if frames is not None else self.stack,
+        )
 
     def to_console(self, show_types: bool = False) -> str:
         """Render complete memory snapshot to console format.
 
+        The segment part of the output is cached per render configuration;
+        the type registry is mutable and is always rendered afresh.
+
         Args:
             show_types: Whether to include type registry in output
         """
@@ -743,15 +1119,25 @@ class MemorySnapshot:
             lines.append(self.types.to_console())
             lines.append("")
 
-        lines.append(self.globals_statics.to_console())
-        lines.append("")
-        lines.append(self.stack.to_console())
-        lines.append("")
-        lines.append(self.heap.to_console())
-
-        if self.cpu is not None:
-            lines.append("")
-            lines.append(self.cpu.to_console())
+        cache = self._console_cache
+        if cache is None:
+            cache = {}
+            object.__setattr__(self, "_console_cache", cache)
+        key = _render_key()
+        body = cache.get(key)
+        if body is None:
+            parts = [
+                self.globals_statics.to_console(),
+                "",
+                self.stack.to_console(),
+                "",
+                self.heap.to_console(),
+            ]
+            if self.cpu is not None:
+                parts.append("")
+                parts.append(self.cpu.to_console())
+            body = cache[key] = "\n".join(parts)
+        lines.append(body)
 
         return "\n".join(lines)
 
@@ -808,11 +1194,62 @@ def create_initial_snapshot(
 #  SnapshotBuilder
 # ============================================================
 
+# dataclasses.replace() introspects the fields on every call; these
+# helpers call the constructors directly on the per-step write paths.
+
+def _block_with_value(block: HeapBlock, value: Any) -> HeapBlock:
+    """Return a copy of a heap block holding a new value."""
+    return HeapBlock(
+        block.address, block.size, value, block.type_name,
+        block.is_freed, block.allocation_site,
+    )
+
+
+def _freed_block(block: HeapBlock) -> HeapBlock:
+    """Return a copy of a heap block marked as freed."""
+    return HeapBlock(
+        block.address, block.size, block.value, block.type_name,
+        True, block.allocation_site,
+    )
+
+
+def _global_with_value(var: GlobalStaticVariable, value: Any) -> GlobalStaticVariable:
+    """Return a copy of a global/static variable holding a new value."""
+    return GlobalStaticVariable(
+        var.name, var.address, value, var.type_name,
+        var.storage_class, var.section,
+    )
+
+
+def _clone_frame(frame: StackFrame) -> StackFrame:
+    """Copy a frame and its variable dicts, sharing the StackVariables.
+
+    Sharing is safe because variables are never mutated in place once
+    they belong to a snapshot: updates replace the StackVariable object.
+    """
+    return StackFrame(
+        function_name=frame.function_name,
+        locals=dict(frame.locals),
+        parameters=dict(frame.parameters),
+        return_address=frame.return_address,
+        frame_pointer=frame.frame_pointer,
+    )
+
+
 class SnapshotBuilder:
     """Builder for creating new memory snapshots from existing ones.
 
-    This builder creates deep copies of the base snapshot to ensure
-    immutability. It provides a fluent API for making memory modifications.
+    The builder is copy-on-write: it starts out sharing every segment of
+    the base snapshot and copies a segment's container only on the first
+    modification of that segment; on the stack, only the frames actually
+    written are copied. Variables and heap blocks stay shared;
+    modifications replace those objects rather than mutating them, so the
+    base snapshot is never changed and segments left untouched are reused
+    as-is by the built snapshot. It provides a fluent API for making
+    memory modifications.
+
+    A builder holds all of its state (including address counters) on the
+    instance and is not thread-safe: use one builder per thread.
 
     Example:
         >>> builder = SnapshotBuilder(snapshot0)
@@ -829,19 +1266,76 @@ class SnapshotBuilder:
         """Initialize builder with a base snapshot.
 
         Args:
-            base: The snapshot to build upon (will be deep copied)
+            base: The snapshot to build upon (never modified)
         """
         self._base = base
-        # Deep copy all mutable state
-        self._globals = copy.deepcopy(base.globals_statics)
-        self._heap = copy.deepcopy(base.heap)
-        self._stack = copy.deepcopy(base.stack)
+        # Segments are shared with base until first written (copy-on-write)
+        self._globals = base.globals_statics
+        self._heap = base.heap
+        self._stack = base.stack
         self._types = base.types  # Types are typically immutable
-        self._cpu = copy.deepcopy(base.cpu) if base.cpu else None
+        self._cpu = base.cpu
+        self._globals_dirty = False
+        self._heap_dirty = False
+        self._stack_dirty = False
+        self._cpu_dirty = False
+        # Indices of frames copied (or pushed) since the stack was owned
+        self._dirty_frames: Set[int] = set()
+        # Global writes staged by set_global() and flushed once by build()
+        self._pending_globals: Dict[str, Any] = {}
+        # Cached reference to the topmost frame, kept in sync by push/pop
+        self._top_frame: Optional[StackFrame] = self._stack.current_frame()
         self._step_id: Optional[int] = None
         self._description: Optional[str] = None
         self._next_stack_addr = 0x7fff_0000  # Default stack address counter
-        self._next_heap_addr = 0x1000  # Default heap address counter
+        self._next_heap_addr = base._next_heap_addr  # Carried on snapshots
+
+    # ------------- Copy-on-write helpers ------------- #
+
+    def _own_globals(self) -> GlobalStaticSegment:
+        """Return the globals segment, copying it on first write."""
+        if not self._globals_dirty:
+            self._globals = GlobalStaticSegment(variables=dict(self._globals.variables))
+            self._globals_dirty = True
+        return self._globals
+
+    def _own_heap(self) -> HeapSegment:
+        """Return the heap segment, copying it on first write."""
+        if not self._heap_dirty:
+            self._heap = HeapSegment(blocks=dict(self._heap.blocks))
+            self._heap_dirty = True
+        return self._heap
+
+    def _own_stack(self) -> StackSegment:
+        """Return the stack segment, copying its frame list on first write.
+
+        The frames themselves stay shared until written: see _own_top_frame().
+        """
+        if not self._stack_dirty:
+            self._stack = StackSegment(frames=list(self._stack.frames))
+            self._stack_dirty = True
+        return self._stack
+
+    def _own_top_frame(self) -> StackFrame:
+        """Return the topmost frame, copying it on first write.
+
+        The caller must have checked that the stack is not empty.
+        """
+        frames = self._own_stack().frames
+        index = len(frames) - 1
+        if index not in self._dirty_frames:
+            frames[index] = self._top_frame = _clone_frame(frames[index])
+            self._dirty_frames.add(index)
+        return self._top_frame
+
+    def _own_cpu(self) -> CpuState:
+        """Return the CPU state, creating or copying it on first write."""
+        if self._cpu is None:
+            self._cpu = CpuState()
+        elif not self._cpu_dirty:
+            self._cpu = replace(self._cpu, extra=dict(self._cpu.extra))
+        self._cpu_dirty = True
+        return self._cpu
 
     # ------------- Stack operations ------------- #
 
@@ -866,7 +1360,10 @@ class SnapshotBuilder:
             return_address=return_address,
             frame_pointer=frame_pointer,
         )
-        self._stack.frames.append(frame)
+        frames = self._own_stack().frames
+        frames.append(frame)
+        self._dirty_frames.add(len(frames) - 1)
+        self._top_frame = frame
         return self
 
     def pop_frame(self) -> "SnapshotBuilder":
@@ -878,9 +1375,12 @@ class SnapshotBuilder:
         Raises:
             RuntimeError: If stack is empty
         """
-        if not self._stack.frames:
-            raise RuntimeError("Cannot pop frame: stack is empty")
-        self._stack.frames.pop()
+        if self._top_frame is None:
+            raise RuntimeError(_MSG_POP_EMPTY)
+        stack = self._own_stack()
+        stack.frames.pop()
+        self._dirty_frames.discard(len(stack.frames))
+        self._top_frame = stack.current_frame()
         return self
 
     def set_local(
@@ -904,9 +1404,9 @@ class SnapshotBuilder:
         Raises:
             RuntimeError: If no frame exists on the stack
         """
-        if not self._stack.frames:
+        if self._top_frame is None:
             raise RuntimeError("No frame on stack for set_local()")
-        frame = self._stack.frames[-1]
+        frame = self._own_top_frame()
 
         if address is None:
             address = self._next_stack_addr
@@ -941,9 +1441,9 @@ class SnapshotBuilder:
         Raises:
             RuntimeError: If no frame exists on the stack
         """
-        if not self._stack.frames:
+        if self._top_frame is None:
             raise RuntimeError("No frame on stack for set_parameter()")
-        frame = self._stack.frames[-1]
+        frame = self._own_top_frame()
 
         if address is None:
             address = self._next_stack_addr
@@ -970,12 +1470,19 @@ class SnapshotBuilder:
         Raises:
             RuntimeError: If variable not found
         """
-        if not self._stack.frames:
+        if self._top_frame is None:
             raise RuntimeError("No frame on stack")
-        frame = self._stack.frames[-1]
-        if name not in frame.locals:
-            raise RuntimeError(f"Local variable '{name}' not found in current frame")
-        frame.locals[name].value = new_value
+        var = self._top_frame.locals.get(name)
+        if var is None:
+            raise RuntimeError(_MSG_NO_LOCAL.format(name))
+        frame = self._own_top_frame()
+        # Replace rather than mutate: the variable may be shared with base
+        frame.locals[name] = StackVariable(
+            name=var.name,
+            address=var.address,
+            value=new_value,
+            type_name=var.type_name,
+        )
         return self
 
     # ------------- Heap operations ------------- #
@@ -1004,17 +1511,18 @@ class SnapshotBuilder:
             ValueError: If address already in use
         """
         if address is None:
-            # Find next available address
+            # The counter is carried across snapshots, so this only skips
+            # blocks that were placed at explicit addresses
             while self._next_heap_addr in self._heap.blocks:
                 self._next_heap_addr += 0x100
             address = self._next_heap_addr
             self._next_heap_addr += 0x100
 
         if address in self._heap.blocks and not self._heap.blocks[address].is_freed:
-            raise ValueError(f"Address {hex(address)} already allocated")
+            raise ValueError(_MSG_ALREADY_ALLOCATED.format(_hex(address)))
 
         value = initial_value if initial_value is not None else 0
-        self._heap.blocks[address] = HeapBlock(
+        self._own_heap().blocks[address] = HeapBlock(
             address=address,
             size=size,
             value=value,
@@ -1039,10 +1547,10 @@ class SnapshotBuilder:
         """
         block = self._heap.blocks.get(address)
         if block is None:
-            raise KeyError(f"No heap block at address {hex(address)}")
+            raise KeyError(_MSG_NO_BLOCK.format(_hex(address)))
         if block.is_freed:
-            raise ValueError(f"Double free detected at address {hex(address)}")
-        block.is_freed = True
+            raise ValueError(_MSG_DOUBLE_FREE.format(_hex(address)))
+        self._own_heap().blocks[address] = _freed_block(block)
         return self
 
     def write_heap(self, address: int, new_value: Any) -> "SnapshotBuilder":
@@ -1061,10 +1569,10 @@ class SnapshotBuilder:
         """
         block = self._heap.blocks.get(address)
         if block is None:
-            raise KeyError(f"No heap block at address {hex(address)}")
+            raise KeyError(_MSG_NO_BLOCK.format(_hex(address)))
         if block.is_freed:
-            raise ValueError(f"Cannot write to freed memory at {hex(address)}")
-        block.value = new_value
+            raise ValueError(_MSG_WRITE_FREED.format(_hex(address)))
+        self._own_heap().blocks[address] = _block_with_value(block, new_value)
         return self
 
     def read_heap(self, address: int) -> Any:
@@ -1074,7 +1582,8 @@ class SnapshotBuilder:
             address: Address of the block
 
         Returns:
-            The value stored in the block
+            A deep copy of the value stored in the block (the block itself
+            may be shared with the base snapshot)
 
         Raises:
             KeyError: If block not found
@@ -1082,10 +1591,10 @@ class SnapshotBuilder:
         """
         block = self._heap.blocks.get(address)
         if block is None:
-            raise KeyError(f"No heap block at address {hex(address)}")
+            raise KeyError(_MSG_NO_BLOCK.format(_hex(address)))
         if block.is_freed:
-            raise ValueError(f"Cannot read freed memory at {hex(address)}")
-        return block.value
+            raise ValueError(_MSG_READ_FREED.format(_hex(address)))
+        return _deepcopy(block.value)
 
     # ------------- Global/Static operations ------------- #
 
@@ -1102,10 +1611,10 @@ class SnapshotBuilder:
         Raises:
             KeyError: If variable not found
         """
-        var = self._globals.variables.get(name)
-        if var is None:
-            raise KeyError(f"No global/static variable named '{name}'")
-        var.value = new_value
+        if name not in self._globals.variables:
+            raise KeyError(_MSG_NO_GLOBAL.format(name))
+        # Staged: repeated writes to one global build a single variable
+        self._pending_globals[name] = new_value
         return self
 
     def add_global(self, variable: GlobalStaticVariable) -> "SnapshotBuilder":
@@ -1117,9 +1626,17 @@ class SnapshotBuilder:
         Returns:
             Self for chaining
         """
-        self._globals.variables[variable.name] = variable
+        self._pending_globals.pop(variable.name, None)
+        self._own_globals().variables[variable.name] = variable
         return self
 
+    def _flush_pending_globals(self) -> None:
+        """Apply the global writes staged by set_global()."""
+        variables = self._own_globals().variables
+        for name, value in self._pending_globals.items():
+            variables[name] = _global_with_value(variables[name], value)
+        self._pending_globals.clear()
+
     # ------------- CPU operations ------------- #
 
     def set_pc(self, pc: int) -> "SnapshotBuilder":
@@ -1131,10 +1648,7 @@ class SnapshotBuilder:
         Returns:
             Self for chaining
         """
-        if self._cpu is None:
-            self._cpu = CpuState(pc=pc)
-        else:
-            self._cpu.pc = pc
+        self._own_cpu().pc = pc
         return self
 
     def set_sp(self, sp: int) -> "SnapshotBuilder":
@@ -1146,10 +1660,7 @@ class SnapshotBuilder:
         Returns:
             Self for chaining
         """
-        if self._cpu is None:
-            self._cpu = CpuState(sp=sp)
-        else:
-            self._cpu.sp = sp
+        self._own_cpu().sp = sp
         return self
 
     def set_bp(self, bp: int) -> "SnapshotBuilder":
@@ -1161,10 +1672,7 @@ class SnapshotBuilder:
         Returns:
             Self for chaining
         """
-        if self._cpu is None:
-            self._cpu = CpuState(bp=bp)
-        else:
-            self._cpu.bp = bp
+        self._own_cpu().bp = bp
         return self
 
     # ------------- Metadata operations ------------- #
@@ -1200,6 +1708,13 @@ class SnapshotBuilder:
             step_id: Override step ID (uses set_step value if None)
             description: Override description (uses set_step value if None)
 
+        Segments that were never written are the base snapshot's own
+        objects and are shared with it by reference.
+
+        The builder stays usable afterwards and continues from the built
+        snapshot, so a sequence of steps can be produced by one builder
+        (address counters keep advancing instead of restarting).
+
         Returns:
             A new MemorySnapshot instance
         """
@@ -1207,8 +1722,11 @@ class SnapshotBuilder:
             self._step_id if self._step_id is not None else self._base.step_id + 1
         )
         desc = description if description is not None else self._description
+        if self._pending_globals:
+            self._flush_pending_globals()
 
-        return MemorySnapshot(
+        snapshot = replace(
+            self._base,
             step_id=sid,
             description=desc,
             globals_statics=self._globals,
@@ -1216,99 +1734,224 @@ class SnapshotBuilder:
             stack=self._stack,
             types=self._types,
             cpu=self._cpu,
+            _next_heap_addr=self._next_heap_addr,
         )
+        # The snapshot now owns these segments: copy again on the next write
+        self._globals_dirty = False
+        self._heap_dirty = False
+        self._stack_dirty = False
+        self._dirty_frames.clear()
+        self._cpu_dirty = False
+        # Continue from the new snapshot, as SnapshotBuilder(snapshot) would
+        self._base = snapshot
+        self._step_id = None
+        self._description = None
+        return snapshot
 
 
 # ============================================================
-#  Utility functions
+#  SnapshotSequence
 # ============================================================
 
-def diff_snapshots(old: MemorySnapshot, new: MemorySnapshot) -> str:
-    """Create a textual diff between two snapshots.
+class SnapshotSequence(Sequence[MemorySnapshot]):
+    """A read-only sequence of snapshots materialized on demand.
 
-    Args:
-        old: Earlier snapshot
-        new: Later snapshot
+    The sequence is described by a base snapshot and a list of steps, each
+    a (description, delta) pair for MemorySnapshot.apply_delta(). Item 0 is
+    the base; item i is the base with the first i steps applied. Only the
+    most recently accessed snapshots are kept; others are replayed from the
+    nearest cached predecessor (or the base) when requested again. Slicing
+    returns a list of the selected snapshots.
 
-    Returns:
-        A string describing the changes
+    Example:
+        >>> steps = [("int x = 10", [("push_frame", "main"),
+        ...                          ("set_local", -1, "x", 10, "int", 0x7000)])]
+        >>> sequence = SnapshotSequence(snapshot0, steps)
+        >>> sequence[1].stack.current_frame().locals["x"].value
+        10
     """
-    changes: List[str] = []
-    changes.append(f"=== Changes from Step {old.step_id} to Step {new.step_id} ===")
-    changes.append("")
 
-    # Global changes
-    global_changes = []
-    for name, var in new.globals_statics.variables.items():
-        old_var = old.globals_statics.variables.get(name)
+    def __init__(
+        self,
+        base: MemorySnapshot,
+        steps: List[Tuple[Optional[str], List[Op]]],
+        cache_size: int = 2,
+    ) -> None:
+        """Initialize the sequence.
+
+        Args:
+            base: Snapshot at index 0
+            steps: (description, delta) pairs producing the following items
+            cache_size: Number of materialized snapshots to keep
+
+        Raises:
+            ValueError: If cache_size is negative
+        """
+        if cache_size < 0:
+            raise ValueError(f"cache_size must be non-negative, got {cache_size}")
+        self._base = base
+        self._steps = list(steps)
+        self._cache_size = cache_size
+        self._cache: Dict[int, MemorySnapshot] = {}
+
+    def __len__(self) -> int:
+        """Return the number of snapshots, base included."""
+        return len(self._steps) + 1
+
+    def __getitem__(
+        self, index: Union[int, slice]
+    ) -> Union[MemorySnapshot, List[MemorySnapshot]]:
+        """Return the snapshot at a given index, replaying steps if needed.
+
+        Raises:
+            IndexError: If index is out of range
+        """
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        index = operator.index(index)
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("SnapshotSequence index out of range")
+        if index == 0:
+            return self._base
+
+        cache = self._cache
+        snapshot = cache.pop(index, None)
+        if snapshot is None:
+            start, snapshot = 0, self._base
+            for i, cached in cache.items():
+                if start < i < index:
+                    start, snapshot = i, cached
+            for description, delta in self._steps[start:index]:
+                snapshot = snapshot.apply_delta(delta, description=description)
+        # Most recently used last; evict from the front
+        cache[index] = snapshot
+        while len(cache) > self._cache_size:
+            del cache[next(iter(cache))]
+        return snapshot
+
+    def __iter__(self) -> Iterator[MemorySnapshot]:
+        """Yield every snapshot in order, applying each step once."""
+        snapshot = self._base
+        yield snapshot
+        for description, delta in self._steps:
+            snapshot = snapshot.apply_delta(delta, description=description)
+            yield snapshot
+
+
+# ============================================================
+#  Utility functions
+# ============================================================
+
+def _diff_globals_into(
+    old: GlobalStaticSegment, new: GlobalStaticSegment, out: List[str]
+) -> None:
+    """Append the change lines between two globals segments to out."""
+    old_vars = old.variables
+    new_vars = new.variables
+    added = 0
+    for name, var in new_vars.items():
+        old_var = old_vars.get(name)
+        if old_var is var:
+            continue
         if old_var is None:
-            global_changes.append(f"  + Added global '{name}' = {var.value}")
+            added += 1
+            out.append(f"  + Added global '{name}' = {var.value}")
         elif old_var.value != var.value:
-            global_changes.append(f"  ~ Changed '{name}': {old_var.value} → {var.value}")
+            out.append(f"  ~ Changed '{name}': {old_var.value} → {var.value}")
 
-    for name in old.globals_statics.variables:
-        if name not in new.globals_statics.variables:
-            global_changes.append(f"  - Removed global '{name}'")
+    # Every name not added was already present: removals exist only
+    # if old has more names than the ones carried over
+    if len(old_vars) > len(new_vars) - added:
+        for name in old_vars:
+            if name not in new_vars:
+                out.append(f"  - Removed global '{name}'")
 
-    if global_changes:
-        changes.append("Globals/Statics:")
-        changes.extend(global_changes)
-        changes.append("")
 
-    # Stack changes
-    stack_changes = []
-    old_depth = len(old.stack.frames)
-    new_depth = len(new.stack.frames)
+def _diff_stack_into(old: StackSegment, new: StackSegment, out: List[str]) -> None:
+    """Append the change lines between two stack segments to out."""
+    old_depth = len(old.frames)
+    new_depth = len(new.frames)
 
     if new_depth > old_depth:
         for i in range(old_depth, new_depth):
-            stack_changes.append(f"  + Pushed frame: {new.stack.frames[i].function_name}")
+            out.append(f"  + Pushed frame: {new.frames[i].function_name}")
     elif new_depth < old_depth:
         for i in range(new_depth, old_depth):
-            stack_changes.append(f"  - Popped frame: {old.stack.frames[i].function_name}")
+            out.append(f"  - Popped frame: {old.frames[i].function_name}")
 
     # Check for variable changes in common frames
     for i in range(min(old_depth, new_depth)):
-        old_frame = old.stack.frames[i]
-        new_frame = new.stack.frames[i]
+        old_frame = old.frames[i]
+        new_frame = new.frames[i]
+        if old_frame is new_frame:
+            continue
 
-        for name, var in new_frame.all_variables().items():
+        for name, var in new_frame.iter_variables():
             old_var = old_frame.get_variable(name)
+            if old_var is var:
+                continue
             if old_var is None:
-                stack_changes.append(
-                    f"  + Added {new_frame.function_name}::{name} = {var.value}"
-                )
+                out.append(f"  + Added {new_frame.function_name}::{name} = {var.value}")
             elif old_var.value != var.value:
-                stack_changes.append(
+                out.append(
                     f"  ~ Changed {new_frame.function_name}::{name}: "
                     f"{old_var.value} → {var.value}"
                 )
 
-    if stack_changes:
-        changes.append("Stack:")
-        changes.extend(stack_changes)
-        changes.append("")
 
-    # Heap changes
-    heap_changes = []
-    for addr, block in new.heap.blocks.items():
-        old_block = old.heap.blocks.get(addr)
+def _diff_heap_into(old: HeapSegment, new: HeapSegment, out: List[str]) -> None:
+    """Append the change lines between two heap segments to out."""
+    old_blocks = old.blocks
+    for addr, block in new.blocks.items():
+        old_block = old_blocks.get(addr)
+        if old_block is block:
+            continue
         if old_block is None:
-            heap_changes.append(
-                f"  + Allocated {block.size} bytes at {hex(addr)} ({block.type_name})"
-            )
+            out.append(f"  + Allocated {block.size} bytes at {_hex(addr)} ({block.type_name})")
         elif old_block.is_freed != block.is_freed:
             if block.is_freed:
-                heap_changes.append(f"  - Freed block at {hex(addr)}")
+                out.append(f"  - Freed block at {_hex(addr)}")
         elif old_block.value != block.value and not block.is_freed:
-            heap_changes.append(
-                f"  ~ Changed block at {hex(addr)}: {old_block.value} → {block.value}"
-            )
-
-    if heap_changes:
-        changes.append("Heap:")
-        changes.extend(heap_changes)
-        changes.append("")
+            out.append(f"  ~ Changed block at {_hex(addr)}: {old_block.value} → {block.value}")
+
+
+def diff_snapshots(old: MemorySnapshot, new: MemorySnapshot) -> str:
+    """Create a textual diff between two snapshots.
+
+    Segments (and stack frames) shared by identity between the two
+    snapshots, as produced by structural sharing, are skipped without
+    being inspected. Each changed segment is compared in a single pass
+    that writes its lines straight into the output.
+
+    Args:
+        old: Earlier snapshot
+        new: Later snapshot
+
+    Returns:
+        A string describing the changes
+    """
+    changes: List[str] = []
+    changes.append(f"=== Changes from Step {old.step_id} to Step {new.step_id} ===")
+    changes.append("")
+
+    sections = (
+        ("Globals/Statics:", old.globals_statics, new.globals_statics, _diff_globals_into),
+        ("Stack:", old.stack, new.stack, _diff_stack_into),
+        ("Heap:", old.heap, new.heap, _diff_heap_into),
+    )
+    for title, old_seg, new_seg, diff_into in sections:
+        if old_seg is new_seg:
+            continue
+        # Emit the title up front and drop it again if nothing follows
+        mark = len(changes)
+        changes.append(title)
+        diff_into(old_seg, new_seg, changes)
+        if len(changes) == mark + 1:
+            changes.pop()
+        else:
+            changes.append("")
 
     if len(changes) == 2:  # Only header and empty line
         changes.append("(no changes)")
@@ -4,11 +4,16 @@ test_memory_model.py
 Comprehensive unit tests for the memory_model library.
 """
 
+import collections.abc
+import pickle
+from dataclasses import FrozenInstanceError
+
 import pytest
 from memory_model import (
     # Core classes
     MemorySnapshot,
     SnapshotBuilder,
+    SnapshotSequence,
     GlobalStaticVariable,
     GlobalStaticSegment,
     HeapBlock,
@@ -35,8 +40,11 @@ from memory_model import (
 # ============================================================
 # Fixtures
 # ============================================================
+# Snapshots and the objects they hold are never mutated by the library,
+# so the fixtures below are built once per session. Tests must not modify
+# them in place (basic_snapshot checks this on teardown).
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_global():
     """Create a sample global variable."""
     return GlobalStaticVariable(
@@ -49,7 +57,7 @@ def sample_global():
     )
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_static():
     """Create a sample static variable."""
     return GlobalStaticVariable(
@@ -62,17 +70,23 @@ def sample_static():
     )
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def basic_snapshot(sample_global):
     """Create a basic memory snapshot."""
-    return create_initial_snapshot(
+    snapshot = create_initial_snapshot(
         globals=[sample_global],
         step_id=0,
         description="Test snapshot",
     )
+    yield snapshot
+    # Canary: shared fixture must come out of the session untouched
+    assert snapshot.step_id == 0
+    assert snapshot.globals_statics.get_variable("g_count").value == 42
+    assert not snapshot.heap.blocks and not snapshot.stack.frames
+    assert not snapshot.types.structs
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_struct():
     """Create a sample struct descriptor."""
     return StructDescriptor(
@@ -171,6 +185,22 @@ class TestPointerValue:
         assert ptr.is_null
         assert str(ptr) == "NULL"
 
+    def test_null_pointer_shared(self):
+        """Test that NULL pointers of one type are a single immutable object."""
+        ptr = PointerValue(0, "struct Node", is_null=True)
+        assert PointerValue(0, "struct Node", is_null=True) is ptr
+        assert PointerValue(0, "int", is_null=True) is not ptr
+        assert PointerValue(0x1000, "int") is not PointerValue(0x1000, "int")
+        with pytest.raises(FrozenInstanceError):
+            ptr.address = 0x1000
+
+    def test_pointer_pickle(self):
+        """Test that unpickled NULL pointers are the shared instance."""
+        ptr = PointerValue(0, "int", is_null=True)
+        assert pickle.loads(pickle.dumps(ptr)) is ptr
+        restored = pickle.loads(pickle.dumps(PointerValue(0x1000, "int")))
+        assert restored == PointerValue(0x1000, "int")
+
     def test_pointer_string_hex(self):
         """Test pointer string representation in hex."""
         render_config.show_addresses_hex = True
@@ -311,6 +341,18 @@ class TestHeapSegment:
         assert len(leaks) == 1
         assert leaks[0].address == 0x2000
 
+    def test_find_leaks_follows_pointers(self):
+        """Test that blocks reachable through heap pointers are not leaks."""
+        null = PointerValue(0, "Node", is_null=True)
+        heap = HeapSegment(blocks={
+            0x1000: HeapBlock(0x1000, 16, {"v": 1, "next": PointerValue(0x2000, "Node")}, "Node"),
+            0x2000: HeapBlock(0x2000, 16, {"v": 2, "next": PointerValue(0x3000, "Node")}, "Node"),
+            0x3000: HeapBlock(0x3000, 16, {"v": 3, "next": null}, "Node"),
+            0x4000: HeapBlock(0x4000, 16, {"v": 4, "next": PointerValue(0x1000, "Node")}, "Node"),
+        })
+        leaks = heap.find_leaks({0x1000})
+        assert [b.address for b in leaks] == [0x4000]
+
     def test_to_console(self):
         """Test console rendering."""
         block = HeapBlock(0x1000, 4, 100, "int", allocation_site="main:10")
@@ -373,6 +415,16 @@ class TestStackFrame:
         assert "arg" in all_vars
         assert "x" in all_vars
 
+    def test_iter_variables_priority(self):
+        """Test that iteration agrees with get_variable on shadowed names."""
+        frame = StackFrame("foo")
+        frame.parameters["x"] = StackVariable("x", 0x7000, 5, "int")
+        frame.locals["x"] = StackVariable("x", 0x7008, 10, "int")
+        frame.locals["y"] = StackVariable("y", 0x7010, 20, "int")
+        names = [name for name, _ in frame.iter_variables()]
+        assert names == ["x", "y"]
+        assert frame.all_variables()["x"] is frame.get_variable("x")
+
     def test_to_console(self):
         """Test console rendering."""
         frame = StackFrame("main")
@@ -432,6 +484,44 @@ class TestStackSegment:
         assert frame_idx == 0
         assert var.value == 10
 
+    def test_find_variable_shadowed(self):
+        """Test that the topmost frame wins for a shadowed name."""
+        snapshot = (
+            SnapshotBuilder(create_initial_snapshot())
+            .push_frame("main")
+            .set_local("n", 1, "int")
+            .push_frame("fact")
+            .set_parameter("n", 2, "int")
+            .build()
+        )
+        frame_idx, var = snapshot.stack.find_variable("n")
+        assert frame_idx == 1
+        assert var.value == 2
+        assert snapshot.find_stack_variable("n") == (frame_idx, var)
+
+        popped = SnapshotBuilder(snapshot).pop_frame().build()
+        frame_idx, var = popped.stack.find_variable("n")
+        assert frame_idx == 0
+        assert var.value == 1
+        assert popped.find_stack_variable("n") == (frame_idx, var)
+
+    def test_find_variable_after_mutation(self):
+        """Test that lookups see writes made to a segment after a lookup."""
+        stack = StackSegment()
+        frame = StackFrame("main")
+        stack.frames.append(frame)
+        assert stack.find_variable("x") is None
+
+        frame.locals["x"] = StackVariable("x", 0x7000, 1, "int")
+        assert stack.find_variable("x") == (0, frame.locals["x"])
+
+        inner = StackFrame("foo")
+        inner.locals["x"] = StackVariable("x", 0x7008, 2, "int")
+        stack.frames.append(inner)
+        frame_idx, var = stack.find_variable("x")
+        assert frame_idx == 1
+        assert var.value == 2
+
     def test_find_variable_not_found(self):
         """Test finding non-existent variable."""
         stack = StackSegment()
@@ -543,18 +633,140 @@ class TestMemorySnapshot:
         desc, addr = pointers[0]
         assert "ptr" in desc
 
+    def test_address_indexes_per_snapshot(self, sample_global):
+        """Test that lookup indexes follow each derived snapshot."""
+        snapshot = create_initial_snapshot(globals=[sample_global])
+        assert snapshot.get_value_at_address(0x1000) is None
+        assert snapshot.find_all_pointers_to(0x1000) == []
+
+        snapshot2 = snapshot.apply_delta(
+            [
+                ("malloc", 0x1000, 4, "int", 7),
+                ("push_frame", "main"),
+                ("set_local", -1, "p", PointerValue(0x1000, "int"), "int*", 0x7000),
+            ]
+        )
+        assert snapshot2.get_value_at_address(0x1000) == 7
+        assert snapshot2.get_value_at_address(0x4000) == 42
+        assert snapshot2.find_all_pointers_to(0x1000) == [("stack main::p", 0x7000)]
+
+        snapshot3 = snapshot2.apply_delta([("free", 0x1000)])
+        assert snapshot3.get_value_at_address(0x1000) is None
+        assert snapshot2.get_value_at_address(0x1000) == 7
+
+    def test_heap_addresses_sorted(self, basic_snapshot):
+        """Test that heap addresses are returned in ascending order."""
+        snapshot = basic_snapshot.apply_delta(
+            [
+                ("malloc", 0x3000, 4, "int", 0),
+                ("malloc", 0x1000, 4, "int", 0),
+                ("malloc", 0x2000, 4, "int", 0),
+                ("free", 0x2000),
+            ]
+        )
+        assert snapshot.heap_addresses() == (0x1000, 0x2000, 0x3000)
+        assert snapshot.heap_addresses() is snapshot.heap_addresses()
+        assert basic_snapshot.heap_addresses() == ()
+
+    def test_heap_addresses_outside_64_bits(self, basic_snapshot):
+        """Test that any integer address can be listed."""
+        snapshot = basic_snapshot.apply_delta(
+            [
+                ("malloc", 2**64, 4, "int", 0),
+                ("malloc", -8, 4, "int", 0),
+            ]
+        )
+        assert snapshot.heap_addresses() == (-8, 2**64)
+
+    def test_snapshot_is_frozen(self, basic_snapshot):
+        """Test that snapshot attributes cannot be reassigned."""
+        with pytest.raises(FrozenInstanceError):
+            basic_snapshot.step_id = 5
+
+    def test_apply_delta(self, basic_snapshot):
+        """Test applying a delta of operations."""
+        snapshot = basic_snapshot.apply_delta(
+            [
+                ("push_frame", "main"),
+                ("set_local", -1, "x", 10, "int", 0x7000),
+                ("malloc", 0x1000, 4, "int", 100),
+                ("set_global", "g_count", 7),
+            ],
+            description="Delta",
+        )
+        assert snapshot.step_id == basic_snapshot.step_id + 1
+        assert snapshot.description == "Delta"
+        assert snapshot.stack.current_frame().locals["x"].value == 10
+        assert snapshot.heap.get_block(0x1000).value == 100
+        assert snapshot.globals_statics.get_variable("g_count").value == 7
+
+        # Original unchanged
+        assert basic_snapshot.stack.depth() == 0
+        assert len(basic_snapshot.heap.blocks) == 0
+        assert basic_snapshot.globals_statics.get_variable("g_count").value == 42
+
+    def test_apply_delta_shares_untouched_segments(self, basic_snapshot):
+        """Test that segments not touched by a delta are shared."""
+        snapshot1 = basic_snapshot.apply_delta([("push_frame", "main")])
+        snapshot2 = snapshot1.apply_delta([("malloc", 0x1000, 4, "int", 0)])
+        assert snapshot2.stack is snapshot1.stack
+        assert snapshot2.globals_statics is basic_snapshot.globals_statics
+        assert snapshot2.heap is not snapshot1.heap
+
+        snapshot3 = snapshot2.apply_delta([("free", 0x1000)])
+        assert snapshot3.heap.get_block(0x1000).is_freed
+        assert not snapshot2.heap.get_block(0x1000).is_freed
+
+    def test_apply_delta_errors(self, basic_snapshot):
+        """Test that delta operations validate like the builder."""
+        with pytest.raises(RuntimeError, match="stack is empty"):
+            basic_snapshot.apply_delta([("pop_frame",)])
+        with pytest.raises(KeyError):
+            basic_snapshot.apply_delta([("free", 0x9999)])
+        with pytest.raises(ValueError, match="Double free"):
+            basic_snapshot.apply_delta([
+                ("malloc", 0x1000, 4, "int", 0),
+                ("free", 0x1000),
+                ("free", 0x1000),
+            ])
+        with pytest.raises(ValueError, match="Unknown delta operation"):
+            basic_snapshot.apply_delta([("teleport", 0x1000)])
+        with pytest.raises(RuntimeError, match=r"No frame on stack for set_local\(\)"):
+            basic_snapshot.apply_delta([("set_local", -1, "x", 1, "int", 0x7000)])
+        with pytest.raises(RuntimeError, match=r"No frame on stack for set_parameter\(\)"):
+            basic_snapshot.apply_delta([("set_parameter", -1, "n", 1, "int", 0x7000)])
+        with pytest.raises(RuntimeError, match="No frame on stack"):
+            basic_snapshot.apply_delta([("update_local", -1, "x", 2)])
+        with pytest.raises(RuntimeError, match="No stack frame at index 3"):
+            basic_snapshot.apply_delta([
+                ("push_frame", "main"),
+                ("set_local", 3, "x", 1, "int", 0x7000),
+            ])
+
     def test_to_console(self, basic_snapshot):
         """Test console rendering."""
         output = basic_snapshot.to_console()
         assert "Step 0" in output
         assert "Test snapshot" in output
 
-    def test_to_console_with_types(self, basic_snapshot, sample_struct):
+    def test_to_console_with_types(self, sample_global, sample_struct):
         """Test console rendering with types."""
-        basic_snapshot.types.register_struct(sample_struct)
-        output = basic_snapshot.to_console(show_types=True)
+        types = TypeRegistry()
+        types.register_struct(sample_struct)
+        snapshot = create_initial_snapshot(globals=[sample_global], types=types)
+        output = snapshot.to_console(show_types=True)
         assert "struct Point" in output
 
+    def test_to_console_follows_render_config(self, basic_snapshot):
+        """Test that cached output is invalidated by config changes."""
+        assert "0x4000" in basic_snapshot.to_console()
+        render_config.show_addresses_hex = False
+        try:
+            assert "16384" in basic_snapshot.to_console()
+        finally:
+            render_config.show_addresses_hex = True
+        assert "0x4000" in basic_snapshot.to_console()
+
 
 # ============================================================
 # SnapshotBuilder Tests
@@ -575,6 +787,85 @@ class TestSnapshotBuilder:
         # New snapshot changed
         assert new_snapshot.globals_statics.variables["g_count"].value == 999
 
+    def test_builder_heap_immutability(self, basic_snapshot):
+        """Test that heap writes and frees don't modify the base snapshot."""
+        builder = SnapshotBuilder(basic_snapshot)
+        builder, addr1 = builder.malloc(4, "int", 100)
+        builder, addr2 = builder.malloc(4, "int", 200)
+        snapshot1 = builder.build()
+
+        snapshot2 = (
+            SnapshotBuilder(snapshot1)
+            .write_heap(addr1, 101)
+            .free(addr2)
+            .build()
+        )
+
+        assert snapshot1.heap.get_block(addr1).value == 100
+        assert not snapshot1.heap.get_block(addr2).is_freed
+        assert snapshot2.heap.get_block(addr1).value == 101
+        assert snapshot2.heap.get_block(addr2).is_freed
+
+        # Read, mutate in place, write back: the base must not see the change
+        builder, node = SnapshotBuilder(snapshot2).malloc(8, "Node", {"data": 1})
+        snapshot3 = builder.build()
+        builder = SnapshotBuilder(snapshot3)
+        value = builder.read_heap(node)
+        value["data"] = 99
+        snapshot4 = builder.write_heap(node, value).build()
+
+        assert snapshot3.heap.get_block(node).value == {"data": 1}
+        assert snapshot4.heap.get_block(node).value == {"data": 99}
+        assert "(no changes)" not in diff_snapshots(snapshot3, snapshot4)
+
+    def test_builder_shares_untouched_segments(self, basic_snapshot):
+        """Test that segments not written by the builder are reused."""
+        unchanged = SnapshotBuilder(basic_snapshot).build()
+        assert unchanged.globals_statics is basic_snapshot.globals_statics
+        assert unchanged.heap is basic_snapshot.heap
+        assert unchanged.stack is basic_snapshot.stack
+
+        changed = SnapshotBuilder(basic_snapshot).set_global("g_count", 1).build()
+        assert changed.globals_statics is not basic_snapshot.globals_statics
+        assert changed.heap is basic_snapshot.heap
+
+    def test_builder_copies_only_written_frames(self, basic_snapshot):
+        """Test that writing the top frame leaves the others shared."""
+        base = (
+            SnapshotBuilder(basic_snapshot)
+            .push_frame("main")
+            .set_local("a", 1, "int")
+            .push_frame("foo")
+            .build()
+        )
+        snapshot = SnapshotBuilder(base).set_local("b", 2, "int").build()
+
+        assert snapshot.stack.frames[0] is base.stack.frames[0]
+        assert snapshot.stack.frames[1] is not base.stack.frames[1]
+        assert "b" not in base.stack.frames[1].locals
+        assert snapshot.stack.frames[1].locals["b"].value == 2
+
+    def test_builder_writes_after_build(self, basic_snapshot):
+        """Test that writes after build() don't leak into the built snapshot."""
+        builder = SnapshotBuilder(basic_snapshot).set_global("g_count", 1)
+        snapshot1 = builder.build()
+        builder.set_global("g_count", 2)
+        snapshot2 = builder.build()
+        assert snapshot1.globals_statics.get_variable("g_count").value == 1
+        assert snapshot2.globals_statics.get_variable("g_count").value == 2
+
+    def test_builder_reused_across_steps(self, basic_snapshot):
+        """Test that one builder can produce a sequence of steps."""
+        builder = SnapshotBuilder(basic_snapshot).push_frame("main")
+        snapshot1 = builder.set_local("a", 1, "int").set_step(5, "five").build()
+        snapshot2 = builder.set_local("b", 2, "int").build()
+
+        assert (snapshot1.step_id, snapshot1.description) == (5, "five")
+        assert (snapshot2.step_id, snapshot2.description) == (6, None)
+        locals2 = snapshot2.stack.current_frame().locals
+        assert locals2["a"].address != locals2["b"].address
+        assert "b" not in snapshot1.stack.current_frame().locals
+
     def test_push_pop_frame(self, basic_snapshot):
         """Test pushing and popping frames."""
         builder = SnapshotBuilder(basic_snapshot)
@@ -653,6 +944,19 @@ class TestSnapshotBuilder:
         frame = snapshot.stack.current_frame()
         assert frame.locals["x"].value == 20
 
+    def test_update_local_preserves_base(self, basic_snapshot):
+        """Test that updating a local doesn't modify the base snapshot."""
+        snapshot1 = (
+            SnapshotBuilder(basic_snapshot)
+            .push_frame("main")
+            .set_local("x", 10, "int")
+            .build()
+        )
+        snapshot2 = SnapshotBuilder(snapshot1).update_local("x", 20).build()
+
+        assert snapshot1.stack.current_frame().locals["x"].value == 10
+        assert snapshot2.stack.current_frame().locals["x"].value == 20
+
     def test_update_local_not_found(self, basic_snapshot):
         """Test updating non-existent local."""
         builder = SnapshotBuilder(basic_snapshot)
@@ -683,6 +987,24 @@ class TestSnapshotBuilder:
         assert snapshot.heap.get_block(addr1) is not None
         assert snapshot.heap.get_block(addr2) is not None
 
+    def test_malloc_auto_address_across_builders(self, basic_snapshot):
+        """Test that the auto-address counter carries over between builders."""
+        builder, addr1 = SnapshotBuilder(basic_snapshot).malloc(4, "int")
+        snapshot1 = builder.build()
+        snapshot2 = snapshot1.apply_delta([("malloc", addr1 + 0x100, 4, "int", 0)])
+        _, addr3 = SnapshotBuilder(snapshot2).malloc(4, "int")
+
+        assert addr3 not in (addr1, addr1 + 0x100)
+        assert snapshot2.heap.get_block(addr3) is None
+
+    def test_type_names_interned(self, basic_snapshot):
+        """Test that equal type names share a single string object."""
+        builder = SnapshotBuilder(basic_snapshot)
+        builder, addr1 = builder.malloc(8, "".join(["struct ", "Node"]))
+        builder, addr2 = builder.malloc(8, "".join(["struct ", "Node"]))
+        snapshot = builder.build()
+        assert snapshot.heap.get_block(addr1).type_name is snapshot.heap.get_block(addr2).type_name
+
     def test_malloc_duplicate_address(self, basic_snapshot):
         """Test malloc with duplicate address."""
         builder = SnapshotBuilder(basic_snapshot)
@@ -769,6 +1091,28 @@ class TestSnapshotBuilder:
         var = snapshot.globals_statics.get_variable("g_count")
         assert var.value == 999
 
+    def test_set_global_staged_until_build(self, basic_snapshot):
+        """Test that repeated global writes are flushed once at build()."""
+        builder = SnapshotBuilder(basic_snapshot)
+        builder.set_global("g_count", 1).set_global("g_count", 2)
+        snapshot1 = builder.build()
+        assert snapshot1.globals_statics.get_variable("g_count").value == 2
+        assert basic_snapshot.globals_statics.get_variable("g_count").value == 42
+
+        # A later add_global() wins over a write staged before it
+        builder.set_global("g_count", 3)
+        builder.add_global(GlobalStaticVariable(
+            name="g_count",
+            address=0x4000,
+            value=5,
+            type_name="int",
+            storage_class=VariableStorageClass.GLOBAL,
+            section=".data",
+        ))
+        snapshot2 = builder.build()
+        assert snapshot2.globals_statics.get_variable("g_count").value == 5
+        assert snapshot1.globals_statics.get_variable("g_count").value == 2
+
     def test_set_global_not_found(self, basic_snapshot):
         """Test setting non-existent global."""
         builder = SnapshotBuilder(basic_snapshot)
@@ -838,6 +1182,66 @@ class TestSnapshotBuilder:
         assert snapshot.step_id == 1
 
 
+# ============================================================
+# SnapshotSequence Tests
+# ============================================================
+
+class TestSnapshotSequence:
+    """Tests for SnapshotSequence."""
+
+    @pytest.fixture
+    def sequence(self, basic_snapshot):
+        """Create a three-step sequence over basic_snapshot."""
+        return SnapshotSequence(basic_snapshot, [
+            ("push", [("push_frame", "main")]),
+            ("alloc", [("malloc", 0x1000, 4, "int", 1, "main:2")]),
+            ("free", [("free", 0x1000)]),
+        ])
+
+    def test_len_and_indexing(self, sequence, basic_snapshot):
+        """Test sequence length, indexing and step metadata."""
+        assert len(sequence) == 4
+        assert sequence[0] is basic_snapshot
+        assert sequence[-1].heap.get_block(0x1000).is_freed
+        assert sequence[2].heap.get_block(0x1000).allocation_site == "main:2"
+        assert [sequence[i].step_id for i in range(4)] == [0, 1, 2, 3]
+        assert sequence[1].description == "push"
+        with pytest.raises(IndexError):
+            sequence[4]
+
+    def test_sequence_protocol(self, sequence, basic_snapshot):
+        """Test iteration, slicing and the collections.abc.Sequence mixins."""
+        assert isinstance(sequence, collections.abc.Sequence)
+        snapshots = list(sequence)
+        assert [s.step_id for s in snapshots] == [0, 1, 2, 3]
+        assert snapshots[3].heap.get_block(0x1000).is_freed
+        assert [s.step_id for s in sequence[1:3]] == [1, 2]
+        assert [s.step_id for s in sequence[::-2]] == [3, 1]
+        assert basic_snapshot in sequence
+        assert sequence.index(basic_snapshot) == 0
+        assert sequence.count(basic_snapshot) == 1
+        with pytest.raises(TypeError):
+            sequence["1"]
+
+    def test_cache_size(self, basic_snapshot):
+        """Test that a zero cache still works and a negative one is rejected."""
+        steps = [("push", [("push_frame", "main")])]
+        uncached = SnapshotSequence(basic_snapshot, steps, cache_size=0)
+        assert uncached[1].stack.depth() == 1
+        with pytest.raises(ValueError, match="cache_size"):
+            SnapshotSequence(basic_snapshot, steps, cache_size=-1)
+
+    def test_replay_cache(self, sequence):
+        """Test that recent snapshots are reused and old ones replayed."""
+        snapshot2 = sequence[2]
+        assert sequence[2] is snapshot2
+        sequence[3]
+        sequence[1]
+        replayed = sequence[2]
+        assert replayed is not snapshot2
+        assert replayed.heap.get_block(0x1000) == snapshot2.heap.get_block(0x1000)
+
+
 # ============================================================
 # Utility Function Tests
 # ============================================================
@@ -851,6 +1255,16 @@ class TestDiffSnapshots:
         diff = diff_snapshots(basic_snapshot, snapshot2)
         assert "no changes" in diff.lower()
 
+    def test_diff_shared_segments(self, basic_snapshot):
+        """Test diff between snapshots that share segments."""
+        snapshot2 = basic_snapshot.apply_delta([("malloc", 0x1000, 4, "int", 0)])
+        diff = diff_snapshots(basic_snapshot, snapshot2)
+        assert "Allocated 4 bytes at 0x1000" in diff
+        assert "Globals" not in diff
+        assert "Stack" not in diff
+
+        assert "no changes" in diff_snapshots(snapshot2, snapshot2).lower()
+
     def test_diff_global_change(self, basic_snapshot):
         """Test diff with global variable change."""
         snapshot2 = (
@@ -863,6 +1277,19 @@ class TestDiffSnapshots:
         assert "42" in diff
         assert "999" in diff
 
+    def test_diff_global_added_and_removed(self, sample_global, sample_static):
+        """Test diff reporting globals present in only one snapshot."""
+        old = create_initial_snapshot(globals=[sample_global])
+        new = create_initial_snapshot(globals=[sample_static])
+        diff = diff_snapshots(old, new)
+        assert f"+ Added global '{sample_static.name}'" in diff
+        assert f"- Removed global '{sample_global.name}'" in diff
+
+        # An added name must not be mistaken for a removal, and vice versa
+        new = SnapshotBuilder(old).add_global(sample_static).build()
+        assert "Removed" not in diff_snapshots(old, new)
+        assert "Removed" in diff_snapshots(new, old)
+
     def test_diff_stack_push(self, basic_snapshot):
         """Test diff with stack frame push."""
         snapshot2 = (
@@ -3,11 +3,19 @@ visual_arrow_test.py
 
 Simple visual test to verify pointer arrows are rendering correctly.
 This creates an obvious scenario with clear pointer relationships.
+
+Set ARROW_DEBUG=1 in the environment to inspect the scenario before
+launch and trace every pointer render.
 """
 
+import functools
+import itertools
+import os
+import sys
+
 from memory_model import (
     create_initial_snapshot,
-    SnapshotBuilder,
+    SnapshotSequence,
     GlobalStaticVariable,
     VariableStorageClass,
     PointerValue,
@@ -16,78 +24,113 @@ from memory_gui import MemoryVisualizer
 import tkinter as tk
 
 
+# Debug inspection and per-render tracing, off by default
+ARROW_DEBUG = os.environ.get("ARROW_DEBUG") == "1"
+
+
+@functools.lru_cache(maxsize=4096)
+def _make_pointer(address, target_type, is_null=False):
+    """Return a shared PointerValue (pointer values are immutable)."""
+    return PointerValue(address, target_type, is_null)
+
+
+# Type names used throughout the scenario, spelled once
+_INT = sys.intern("int")
+_NODE = sys.intern("Node")
+_INT_PTR = sys.intern("int*")
+_NODE_PTR = sys.intern("Node*")
+
+# Shared NULL "next" link
+_NULL_NODE_PTR = _make_pointer(0, _NODE, True)
+
+# Console blocks printed by main(), each written in a single call
+_BANNER = "\n".join([
+    "=" * 70,
+    "VISUAL POINTER ARROW TEST",
+    "=" * 70,
+    "",
+    "This test creates clear pointer scenarios.",
+    "",
+    "YOU SHOULD SEE:",
+    "  1. Step 1: RED ARROW from 'ptr' (stack) to heap block",
+    "  2. Step 2: TWO RED ARROWS from ptr & ptr2 to same heap block",
+    "  3. Step 3: RED ARROWS showing linked list chain",
+    "",
+    "If you DON'T see red arrows, there's an issue!",
+    "",
+]) + "\n"
+
+_DEBUG_HEADER = "\n".join([
+    "=" * 70,
+    "DEBUG: Checking snapshot 1 for pointers...",
+    "=" * 70,
+]) + "\n"
+
+_LAUNCH_MESSAGE = "\n".join([
+    "\n" + "=" * 70,
+    "Launching GUI...",
+    "=" * 70,
+    "",
+    "INSTRUCTIONS:",
+    "  1. Use the slider or Next button to navigate",
+    "  2. Look for RED ARROWS connecting boxes",
+    "  3. Arrows should go from pointer variables to their targets",
+    "",
+]) + "\n"
+
+# Heap blocks listed by the snapshot debug dump before summarising the rest
+_DEBUG_HEAP_SAMPLE = 5
+
+# Per-render trace header, filled with the step id and tracked position count
+_DEBUG_RENDER_TPL = (
+    "\n[DEBUG] _render_pointers called for step {}\n"
+    "[DEBUG] Item positions tracked: {}\n"
+)
+
+
 def create_simple_pointer_scenario():
-    """Create a very simple scenario with obvious pointers."""
+    """Create a very simple scenario with obvious pointers.
 
-    # Step 1: Just a stack pointer to heap
+    The steps are recorded as deltas and replayed on demand by the
+    returned SnapshotSequence.
+    """
     snapshot0 = create_initial_snapshot(step_id=0, description="Initial empty state")
 
-    # Step 2: Allocate heap and create pointer
-    builder = SnapshotBuilder(snapshot0)
-    builder.push_frame("main")
-    builder, heap_addr = builder.malloc(4, "int", 42, allocation_site="line 10")
+    heap_addr, node1, node2 = 0x1000, 0x1100, 0x1200
+    ptr_addr, ptr2_addr, head_addr = 0x7fff0000, 0x7fff0008, 0x7fff0010
+    heap_hex = hex(heap_addr)
 
     print(f"\n{'='*70}")
-    print(f"HEAP ADDRESS ALLOCATED: {hex(heap_addr)}")
+    print(f"HEAP ADDRESS ALLOCATED: {heap_hex}")
     print(f"{'='*70}\n")
-
-    snapshot1 = (
-        builder
-        .set_local("ptr", PointerValue(heap_addr, "int"), "int*")
-        .set_step(1, f"Stack pointer → Heap at {hex(heap_addr)}")
-        .build()
-    )
-
-    # Step 3: Add another pointer to same location
-    snapshot2 = (
-        SnapshotBuilder(snapshot1)
-        .set_local("ptr2", PointerValue(heap_addr, "int"), "int*")
-        .set_step(2, f"TWO pointers → Same heap location")
-        .build()
-    )
-
-    # Step 4: Create linked list
-    builder3 = SnapshotBuilder(snapshot2)
-    builder3, node1 = builder3.malloc(8, "Node", {"data": 10, "next": PointerValue(0, "Node", is_null=True)})
-    builder3, node2 = builder3.malloc(8, "Node", {"data": 20, "next": PointerValue(0, "Node", is_null=True)})
-
-    print(f"NODE 1 ADDRESS: {hex(node1)}")
-    print(f"NODE 2 ADDRESS: {hex(node2)}\n")
-
-    snapshot3 = (
-        builder3
-        .write_heap(node1, {"data": 10, "next": PointerValue(node2, "Node")})
-        .set_local("head", PointerValue(node1, "Node"), "Node*")
-        .set_step(3, "Linked list: head → node1 → node2")
-        .build()
-    )
-
-    return [snapshot0, snapshot1, snapshot2, snapshot3]
-
-
-def main():
-    """Run visual arrow test with debug info."""
-    print("="*70)
-    print("VISUAL POINTER ARROW TEST")
-    print("="*70)
-    print()
-    print("This test creates clear pointer scenarios.")
-    print()
-    print("YOU SHOULD SEE:")
-    print("  1. Step 1: RED ARROW from 'ptr' (stack) to heap block")
-    print("  2. Step 2: TWO RED ARROWS from ptr & ptr2 to same heap block")
-    print("  3. Step 3: RED ARROWS showing linked list chain")
-    print()
-    print("If you DON'T see red arrows, there's an issue!")
-    print()
-
-    snapshots = create_simple_pointer_scenario()
-
-    print("="*70)
-    print("DEBUG: Checking snapshot 1 for pointers...")
-    print("="*70)
-
-    snapshot = snapshots[1]
+    print(f"NODE 1 ADDRESS: {hex(node1)}\nNODE 2 ADDRESS: {hex(node2)}\n")
+
+    node1_init = {"data": 10, "next": _NULL_NODE_PTR}
+    steps = [
+        # Step 1: Allocate heap and create a stack pointer to it
+        (f"Stack pointer → Heap at {heap_hex}", [
+            ("push_frame", "main"),
+            ("malloc", heap_addr, 4, _INT, 42, "line 10"),
+            ("set_local", -1, "ptr", _make_pointer(heap_addr, _INT), _INT_PTR, ptr_addr),
+        ]),
+        # Step 2: Add another pointer to same location
+        ("TWO pointers → Same heap location", [
+            ("set_local", -1, "ptr2", _make_pointer(heap_addr, _INT), _INT_PTR, ptr2_addr),
+        ]),
+        # Step 3: Create linked list
+        ("Linked list: head → node1 → node2", [
+            ("malloc", node1, 8, _NODE, node1_init),
+            ("malloc", node2, 8, _NODE, {"data": 20, "next": _NULL_NODE_PTR}),
+            ("write_heap", node1, {**node1_init, "next": _make_pointer(node2, _NODE)}),
+            ("set_local", -1, "head", _make_pointer(node1, _NODE), _NODE_PTR, head_addr),
+        ]),
+    ]
+    return SnapshotSequence(snapshot0, steps)
+
+
+def print_snapshot_debug(snapshot):
+    """Print the stack locals and heap blocks of a snapshot."""
+    sys.stdout.write(_DEBUG_HEADER)
 
     # Check if pointers exist
     print(f"\nStack frames: {len(snapshot.stack.frames)}")
@@ -96,49 +139,67 @@ def main():
         print(f"Locals in frame: {list(frame.locals.keys())}")
         for name, var in frame.locals.items():
             print(f"  {name}: type={var.type_name}, value={var.value}")
-            if isinstance(var.value, PointerValue):
-                print(f"    ✓ IS POINTER! Points to {hex(var.value.address)}")
-
-    print(f"\nHeap blocks: {len(snapshot.heap.blocks)}")
-    for addr, block in snapshot.heap.blocks.items():
-        print(f"  Block at {hex(addr)}: type={block.type_name}, freed={block.is_freed}")
-
-    print("\n" + "="*70)
-    print("Launching GUI...")
-    print("="*70)
-    print()
-    print("INSTRUCTIONS:")
-    print("  1. Use the slider or Next button to navigate")
-    print("  2. Look for RED ARROWS connecting boxes")
-    print("  3. Arrows should go from pointer variables to their targets")
-    print()
+            # Duck-typed: anything with an address is treated as a pointer
+            addr = getattr(var.value, "address", None)
+            if addr is not None and not getattr(var.value, "is_null", False):
+                print(f"    ✓ IS POINTER! Points to {hex(addr)}")
+
+    blocks = snapshot.heap.blocks
+    total = len(blocks)
+    lines = [f"\nHeap blocks: {total}"]
+    lines.extend(
+        f"  Block at {hex(addr)}: type={block.type_name}, freed={block.is_freed}"
+        for addr, block in itertools.islice(blocks.items(), _DEBUG_HEAP_SAMPLE)
+    )
+    if total > _DEBUG_HEAP_SAMPLE:
+        lines.append(f"  ... ({total - _DEBUG_HEAP_SAMPLE} more)")
+    print("\n".join(lines))
 
-    # Create visualizer
-    visualizer = MemoryVisualizer(snapshots)
 
-    # Add debug callback to check arrow rendering
-    original_render = visualizer.renderer._render_pointers
+def install_render_debug(visualizer):
+    """Trace every pointer render through a renderer callback."""
+    # Bound once here rather than looked up on every render
+    renderer = visualizer.renderer
+    canvas = renderer.canvas
+    positions = renderer.item_positions  # cleared in place, never rebound
 
     def debug_render_pointers(snapshot):
-        print(f"\n[DEBUG] _render_pointers called for step {snapshot.step_id}")
-        print(f"[DEBUG] Item positions tracked: {len(visualizer.renderer.item_positions)}")
-        for addr, pos in list(visualizer.renderer.item_positions.items())[:5]:
+        sys.stdout.write(_DEBUG_RENDER_TPL.format(snapshot.step_id, len(positions)))
+        for addr, pos in itertools.islice(positions.items(), 5):
             print(f"  {hex(addr)}: {pos}")
 
-        # Call original
-        original_render(snapshot)
+        # Settle pending canvas work in one flush before querying it
+        canvas.update_idletasks()
 
-        # Check if arrows were created
-        all_items = visualizer.renderer.canvas.find_all()
-        arrows = [item for item in all_items if visualizer.renderer.canvas.type(item) == 'line']
+        # Check if arrows were created (the renderer counts them as it draws)
+        all_items = canvas.find_all()
+        arrows = renderer.arrow_count
         print(f"[DEBUG] Total canvas items: {len(all_items)}")
-        print(f"[DEBUG] Arrow items (lines): {len(arrows)}")
+        print(f"[DEBUG] Arrow items (lines): {arrows}")
         if arrows:
             print(f"[DEBUG] ✓ ARROWS WERE CREATED!")
         else:
             print(f"[DEBUG] ✗ NO ARROWS FOUND!")
 
-    visualizer.renderer._render_pointers = debug_render_pointers
+    renderer.add_render_callback(debug_render_pointers)
+
+
+def main():
+    """Run visual arrow test (with debug info if ARROW_DEBUG is set)."""
+    sys.stdout.write(_BANNER)
+
+    snapshots = create_simple_pointer_scenario()
+
+    if ARROW_DEBUG:
+        print_snapshot_debug(snapshots[1])
+
+    sys.stdout.write(_LAUNCH_MESSAGE)
+
+    # Create visualizer
+    visualizer = MemoryVisualizer(snapshots)
+
+    if ARROW_DEBUG:
+        install_render_debug(visualizer)
 
     visualizer.run()
 